@@ -97,19 +97,18 @@ def show_s3_buckets():
 
 
 def show_s3_buckets_acl():
-  for region in get_regions():
-    print("###Region:({})###".format(region))
-    for bucket in get_s3_buckets(region):
-      print(" * {}".format(bucket.name))
-      for grant in bucket.Acl().grants:
-        grantee = grant['Grantee']
-        display_name = grantee.get("DisplayName", 'undefined')
-        uri = grantee.get("URI", 'undefined')
-        permission = grant['Permission']
-        if display_name == 'undefined':
-          print("   - {}({})".format(uri, permission))
-        else:
-          print("   - {}({})".format(display_name, permission))
+  # bucket listing is global, so list once instead of once per region
+  for bucket in get_s3_buckets(None):
+    print(" * {}".format(bucket.name))
+    for grant in bucket.Acl().grants:
+      grantee = grant['Grantee']
+      display_name = grantee.get("DisplayName", 'undefined')
+      uri = grantee.get("URI", 'undefined')
+      permission = grant['Permission']
+      if display_name == 'undefined':
+        print("   - {}({})".format(uri, permission))
+      else:
+        print("   - {}({})".format(display_name, permission))
 
 
 def get_iam_users():
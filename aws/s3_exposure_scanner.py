@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+
+ALL_USERS_URI = 'http://acs.amazonaws.com/groups/global/AllUsers'
+AUTHENTICATED_USERS_URI = 'http://acs.amazonaws.com/groups/global/AuthenticatedUsers'
+
+_clients = {}
+_clients_lock = threading.Lock()
+_client_config = Config()
+
+
+def set_max_connections(max_connections):
+  # every thread that can call a client at once needs its own pooled
+  # connection, otherwise urllib3 drops them and reconnects over TLS
+  global _client_config
+  with _clients_lock:
+    _client_config = Config(max_pool_connections=max_connections)
+    _clients.clear()
+
+
+def get_s3_client(region=None):
+  # boto3 clients are thread safe, but creating them from the shared default
+  # session is not, so build one per region under a lock and reuse it.
+  with _clients_lock:
+    if region not in _clients:
+      _clients[region] = boto3.client(
+          's3', region_name=region, config=_client_config)
+    return _clients[region]
+
+
+def get_bucket_region(bucket_name):
+  location = get_s3_client().get_bucket_location(
+      Bucket=bucket_name)['LocationConstraint']
+  if location is None:
+    return 'us-east-1'
+  if location == 'EU':
+    return 'eu-west-1'
+  return location
+
+
+def classify_acl(grants):
+  exposures = []
+  for grant in grants:
+    uri = grant['Grantee'].get('URI')
+    if uri == ALL_USERS_URI:
+      exposures.append({'grantee': 'AllUsers',
+                        'permission': grant['Permission']})
+    elif uri == AUTHENTICATED_USERS_URI:
+      exposures.append({'grantee': 'AuthenticatedUsers',
+                        'permission': grant['Permission']})
+  return exposures
+
+
+def error_code(e):
+  if isinstance(e, ClientError):
+    return e.response['Error']['Code']
+  return e.__class__.__name__
+
+
+def fetch_acl_grants(client, bucket_name):
+  try:
+    return classify_acl(client.get_bucket_acl(Bucket=bucket_name)['Grants']), None
+  except (ClientError, BotoCoreError) as e:
+    return None, error_code(e)
+
+
+def fetch_policy_public(client, bucket_name):
+  try:
+    return client.get_bucket_policy_status(
+        Bucket=bucket_name)['PolicyStatus']['IsPublic'], None
+  except (ClientError, BotoCoreError) as e:
+    if error_code(e) == 'NoSuchBucketPolicy':
+      return False, None
+    return None, error_code(e)
+
+
+def fetch_public_access_block(client, bucket_name):
+  try:
+    return client.get_public_access_block(
+        Bucket=bucket_name)['PublicAccessBlockConfiguration'], None
+  except (ClientError, BotoCoreError) as e:
+    if error_code(e) == 'NoSuchPublicAccessBlockConfiguration':
+      return {}, None
+    return None, error_code(e)
+
+
+def audit_bucket(bucket_name, lookups):
+  result = {'bucket': bucket_name, 'errors': {}}
+  try:
+    region = get_bucket_region(bucket_name)
+  except (ClientError, BotoCoreError) as e:
+    result['region'] = None
+    result['errors']['location'] = error_code(e)
+    region = None
+  else:
+    result['region'] = region
+  client = get_s3_client(region)
+
+  # the three settings are independent, so fetch them in parallel once the
+  # region is known
+  fields = [
+      ('acl_grants', 'acl', fetch_acl_grants),
+      ('policy_public', 'policy', fetch_policy_public),
+      ('public_access_block', 'public_access_block', fetch_public_access_block)
+  ]
+  futures = [(field, error_key, lookups.submit(fetch, client, bucket_name))
+             for field, error_key, fetch in fields]
+  for field, error_key, future in futures:
+    value, error = future.result()
+    result[field] = value
+    if error is not None:
+      result['errors'][error_key] = error
+
+  # an unreadable setting is not assumed to block or expose anything, so
+  # whatever was read still decides whether the bucket is public
+  acl_grants = result['acl_grants'] or []
+  policy_public = result['policy_public'] or False
+  block = result['public_access_block'] or {}
+  acl_public = any(g['grantee'] == 'AllUsers' for g in acl_grants)
+  acl_authenticated = any(
+      g['grantee'] == 'AuthenticatedUsers' for g in acl_grants)
+  acl_exposed = (acl_public or acl_authenticated) and not block.get(
+      'IgnorePublicAcls', False)
+  policy_exposed = policy_public and not block.get(
+      'RestrictPublicBuckets', False)
+  lookup_failed = any(
+      key in result['errors'] for key in ['acl', 'policy', 'public_access_block'])
+  if (acl_public and acl_exposed) or policy_exposed:
+    result['exposure'] = 'public'
+  elif lookup_failed:
+    result['exposure'] = 'unknown'
+  elif acl_exposed:
+    result['exposure'] = 'authenticated-users'
+  else:
+    result['exposure'] = 'private'
+  return result
+
+
+def iter_bucket_names():
+  # bucket listing is global, one call covers every region
+  for bucket in get_s3_client().list_buckets()['Buckets']:
+    yield bucket['Name']
+
+
+def write_completed(pending, out):
+  done, pending = wait(pending, return_when=FIRST_COMPLETED)
+  for future in done:
+    out.write(json.dumps(future.result(), default=str) + '\n')
+  out.flush()
+  return pending
+
+
+def positive_int(value):
+  number = int(value)
+  if number < 1:
+    raise argparse.ArgumentTypeError(
+        "{} is not a positive integer".format(value))
+  return number
+
+
+def scan_s3_exposure(workers=16, out=sys.stdout):
+  # each audit worker runs its three settings lookups on a separate pool,
+  # so up to 3 * workers calls can share one regional client at a time
+  set_max_connections(workers * 3)
+  # keep at most 2 * workers audits in flight so memory stays bounded
+  # regardless of how many buckets the account holds
+  max_pending = workers * 2
+  pending = set()
+  with ThreadPoolExecutor(max_workers=workers * 3) as lookups, \
+          ThreadPoolExecutor(max_workers=workers) as executor:
+    for bucket_name in iter_bucket_names():
+      pending.add(executor.submit(audit_bucket, bucket_name, lookups))
+      if len(pending) >= max_pending:
+        pending = write_completed(pending, out)
+    while pending:
+      pending = write_completed(pending, out)
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(
+      description='Streams S3 bucket public exposure as JSON Lines')
+  parser.add_argument(
+      '--workers',
+      help='Number of buckets audited concurrently',
+      type=positive_int,
+      default=16)
+  args = parser.parse_args()
+  scan_s3_exposure(workers=args.workers)